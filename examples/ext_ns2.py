@@ -66,5 +66,5 @@ netsim.setup()
 # cProfile.run("netsim.run()")
 netsim.run()
 
-print(json.dumps(netsim.net_stats, indent=4))
-print(json.dumps(netsim.routing_stats, indent=4))
+print(json.dumps(netsim.net_stats.asdict(), indent=4))
+print(json.dumps(netsim.routing_stats.asdict(), indent=4))
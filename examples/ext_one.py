@@ -62,5 +62,5 @@ netsim.setup()
 
 netsim.run()
 
-print(json.dumps(netsim.net_stats, indent=4))
-print(json.dumps(netsim.routing_stats, indent=4))
+print(json.dumps(netsim.net_stats.asdict(), indent=4))
+print(json.dumps(netsim.routing_stats.asdict(), indent=4))
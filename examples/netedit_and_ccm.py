@@ -65,5 +65,5 @@ netsim = pons.NetSim(SIM_TIME, nodes, config=config, msggens=[msggenconfig])
 netsim.setup()
 netsim.run()
 
-print(json.dumps(netsim.net_stats, indent=4))
-print(json.dumps(netsim.routing_stats, indent=4))
+print(json.dumps(netsim.net_stats.asdict(), indent=4))
+print(json.dumps(netsim.routing_stats.asdict(), indent=4))
@@ -0,0 +1,119 @@
+"""Numeric kernels for the simulation core.
+
+For large networks the kernels are JIT compiled with numba (and cached on
+disk) if it is installed, otherwise vectorized numpy versions are used.
+"""
+
+from typing import Tuple
+
+import numpy as np
+
+# compiling the numba kernel takes seconds, so it is only used (and numba only
+# imported) for networks with at least this number of nodes
+NUMBA_MIN_NODES = 2000
+
+# number of rows of the N x N distance matrix calculated at once by the numpy
+# kernel, which bounds its memory use to a few float64 rows of N
+NUMPY_BLOCK_ROWS = 256
+
+# replaced by numba.prange once numba has been imported
+prange = range
+
+# None until numba was tried, False if it is not available
+_neighbors_jit = None
+
+
+def _neighbors_numpy(
+    xs: np.ndarray, ys: np.ndarray, zs: np.ndarray, ranges_sq: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    n = len(xs)
+    counts = np.zeros(n, dtype=np.int32)
+    pieces = []
+    # only a block of rows of the distance matrix is kept in memory at once
+    for start in range(0, n, NUMPY_BLOCK_ROWS):
+        end = min(start + NUMPY_BLOCK_ROWS, n)
+        block = np.arange(end - start)
+        d = xs[start:end, None] - xs
+        dist = d * d
+        d = ys[start:end, None] - ys
+        dist += d * d
+        d = zs[start:end, None] - zs
+        dist += d * d
+        # sqrt is expensive, so we use the square of the distance
+        in_range = dist <= ranges_sq[start:end, None]
+        in_range[block, block + start] = False
+        rows, cols = np.nonzero(in_range)
+        counts[start:end] = np.bincount(rows, minlength=end - start)
+        pieces.append(cols.astype(np.int32))
+    indptr = np.zeros(n + 1, dtype=np.int32)
+    indptr[1:] = np.cumsum(counts)
+    if len(pieces) == 0:
+        return indptr, np.empty(0, dtype=np.int32)
+    return indptr, np.concatenate(pieces)
+
+
+def _neighbors_numba(
+    xs: np.ndarray, ys: np.ndarray, zs: np.ndarray, ranges_sq: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    n = len(xs)
+    counts = np.zeros(n, dtype=np.int32)
+    for i in prange(n):
+        c = 0
+        for j in range(n):
+            if i != j:
+                dx = xs[i] - xs[j]
+                dy = ys[i] - ys[j]
+                dz = zs[i] - zs[j]
+                if dx * dx + dy * dy + dz * dz <= ranges_sq[i]:
+                    c += 1
+        counts[i] = c
+
+    indptr = np.zeros(n + 1, dtype=np.int32)
+    for i in range(n):
+        indptr[i + 1] = indptr[i] + counts[i]
+
+    indices = np.empty(indptr[n], dtype=np.int32)
+    for i in prange(n):
+        k = indptr[i]
+        for j in range(n):
+            if i != j:
+                dx = xs[i] - xs[j]
+                dy = ys[i] - ys[j]
+                dz = zs[i] - zs[j]
+                if dx * dx + dy * dy + dz * dz <= ranges_sq[i]:
+                    indices[k] = j
+                    k += 1
+    return indptr, indices
+
+
+def _numba_neighbors():
+    """Return the numba compiled neighbor kernel, or None without numba."""
+    global _neighbors_jit
+    global prange
+    if _neighbors_jit is None:
+        try:
+            import numba
+        except ImportError:
+            _neighbors_jit = False
+        else:
+            prange = numba.prange
+            # no fastmath, the range check has to match has_contact exactly
+            _neighbors_jit = numba.njit(parallel=True, cache=True)(_neighbors_numba)
+    return _neighbors_jit or None
+
+
+def neighbors(
+    xs: np.ndarray, ys: np.ndarray, zs: np.ndarray, ranges_sq: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Calculate the neighbors of all nodes from their coordinates.
+
+    Node i sees node j if their distance is within the range of node i, given
+    as squared range in `ranges_sq`. The result is returned in CSR form as int32
+    arrays `(indptr, indices)`, the neighbors of node i being
+    `indices[indptr[i]:indptr[i + 1]]` in ascending order.
+    """
+    if len(xs) >= NUMBA_MIN_NODES:
+        kernel = _numba_neighbors()
+        if kernel is not None:
+            return kernel(xs, ys, zs, ranges_sq)
+    return _neighbors_numpy(xs, ys, zs, ranges_sq)
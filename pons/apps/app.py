@@ -34,7 +34,7 @@ class App(object):
         self.on_msg_received(msg)
 
     def send(self, msg: pons.Message):
-        self.netsim.routing_stats["created"] += 1
+        self.netsim.routing_stats.created += 1
         event_log(
             self.netsim.env.now,
             "APP",
@@ -1,13 +1,15 @@
 from json import dumps, loads
-from typing import Tuple
+from typing import Optional, Tuple
 
 event_log_fh = None
 event_filter = []
 
 
-def is_logging() -> bool:
+def is_logging(category: Optional[str] = None) -> bool:
+    """Check if events (of the given category) would be written to the log."""
     global event_log_fh
-    return event_log_fh is not None
+    global event_filter
+    return event_log_fh is not None and category not in event_filter
 
 
 def open_log(filename: str = "/tmp/events.log"):
@@ -19,12 +21,10 @@ def event_log(ts: float, category: str, msg: dict):
     global event_log_fh
     global event_filter
 
-    for f in event_filter:
-        if f == category:
-            return
+    if event_log_fh is None or category in event_filter:
+        return
 
-    if event_log_fh is not None:
-        event_log_fh.write("%f %s %s\n" % (ts, category, dumps(msg)))
+    event_log_fh.write("%f %s %s\n" % (ts, category, dumps(msg)))
 
 
 def close_log():
@@ -49,7 +49,7 @@ def message_event_generator(netsim, msggenconfig):
             )
         else:
             yield env.timeout(msggenconfig["interval"])
-        netsim.routing_stats["created"] += 1
+        netsim.routing_stats.created += 1
         counter += 1
         if isinstance(msggenconfig["src"], tuple):
             src = random.randint(msggenconfig["src"][0], msggenconfig["src"][1] - 1)
@@ -89,7 +89,7 @@ def message_burst_generator(netsim, msggenconfig):
             yield env.timeout(msggenconfig["interval"])
 
         for src in range(msggenconfig["src"][0], msggenconfig["src"][1]):
-            netsim.routing_stats["created"] += 1
+            netsim.routing_stats.created += 1
             counter += 1
             if isinstance(msggenconfig["dst"], tuple):
                 dst = random.randint(msggenconfig["dst"][0], msggenconfig["dst"][1] - 1)
@@ -35,8 +35,12 @@ class CommonContactPlan(object):
         return []
 
 
-@dataclass(frozen=True)
+# not frozen so that the end of an open contact can be set in place, the hash
+# is kept as contact plans are hashed by their contacts
+@dataclass(unsafe_hash=True)
 class CoreContact(object):
+    __slots__ = ("timespan", "nodes", "bw", "loss", "delay", "jitter")
+
     timespan: Tuple[int, int]
     nodes: Tuple[int, int]
     bw: int
@@ -91,7 +91,7 @@ class Node(object):
                             continue
                         # print("tx_time: %f" % tx_time)
                         receiver = netsim.nodes[nid]
-                        netsim.net_stats["tx"] += 1
+                        netsim.net_stats.tx += 1
                         start_delayed(
                             netsim.env, receiver.on_recv(netsim, self.id, msg), tx_time
                         )
@@ -108,7 +108,7 @@ class Node(object):
                     else:
                         # self.log("packet loss: %s to %d" %
                         # (msg.id, to_nid))
-                        netsim.net_stats["loss"] += 1
+                        netsim.net_stats.loss += 1
                         pons.simulation.event_log(
                             netsim.env.now,
                             "NET",
@@ -133,7 +133,7 @@ class Node(object):
                             continue
                         # self.log("sending msg %s to %d" % (msg, to_nid))
                         receiver = netsim.nodes[to_nid]
-                        netsim.net_stats["tx"] += 1
+                        netsim.net_stats.tx += 1
                         pons.simulation.event_log(
                             netsim.env.now,
                             "NET",
@@ -150,7 +150,7 @@ class Node(object):
                     else:
                         # self.log("packet loss: %s to %d" %
                         # (msg.id, to_nid))
-                        netsim.net_stats["loss"] += 1
+                        netsim.net_stats.loss += 1
                         pons.simulation.event_log(
                             netsim.env.now,
                             "NET",
@@ -173,7 +173,7 @@ class Node(object):
         for net in self.net.values():
             if from_nid in self.neighbors[net.name]:
                 # self.log("Node %d received msg %s from %d" % (self.id, msg.id, from_nid))
-                netsim.net_stats["rx"] += 1
+                netsim.net_stats.rx += 1
                 netsim.nodes[from_nid].router._on_tx_succeeded(msg.unique_id(), self.id)
                 pons.simulation.event_log(
                     netsim.env.now,
@@ -193,7 +193,7 @@ class Node(object):
             else:
                 # print("Node %d received msg %s from %d (not neighbor)" %
                 #      (to_nid, msg, from_nid))
-                netsim.net_stats["drop"] += 1
+                netsim.net_stats.drop += 1
                 netsim.nodes[from_nid].router._on_tx_failed(msg.unique_id(), self.id)
                 pons.simulation.event_log(
                     netsim.env.now,
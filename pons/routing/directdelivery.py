@@ -16,7 +16,7 @@ class DirectDeliveryRouter(Router):
     def forward(self, msg):
         if msg.dst in self.peers and not self.msg_already_spread(msg, msg.dst):
             # self.log("sending directly to receiver")
-            self.netsim.routing_stats["started"] += 1
+            self.netsim.routing_stats.started += 1
             # self.netsim.env.process(
             self.send(msg.dst, msg)
             # )
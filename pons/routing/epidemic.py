@@ -18,7 +18,7 @@ class EpidemicRouter(Router):
         # self.log("forwarding2 msg (%s)" % msg.id)
         if msg.dst in self.peers and not self.msg_already_spread(msg, msg.dst):
             # self.log("sending %s directly to receiver" % msg.id)
-            self.netsim.routing_stats["started"] += 1
+            self.netsim.routing_stats.started += 1
             # self.netsim.env.process(
             self.send(msg.dst, msg)
             # )
@@ -29,7 +29,7 @@ class EpidemicRouter(Router):
             for peer in self.peers:
                 if not self.msg_already_spread(msg, peer):
                     # self.log("forwarding to peer")
-                    self.netsim.routing_stats["started"] += 1
+                    self.netsim.routing_stats.started += 1
                     # self.netsim.env.process(
                     self.send(peer, msg)
                     # )
@@ -17,7 +17,7 @@ class FirstContactRouter(Router):
     def forward(self, msg):
         if msg.dst in self.peers and not self.msg_already_spread(msg, msg.dst):
             # self.log("sending directly to receiver")
-            self.netsim.routing_stats["started"] += 1
+            self.netsim.routing_stats.started += 1
             # self.netsim.env.process(
             self.send(msg.dst, msg)
             # )
@@ -28,7 +28,7 @@ class FirstContactRouter(Router):
             for peer in self.peers:
                 if not self.msg_already_spread(msg, peer):
                     # print("forwarding to peer")
-                    self.netsim.routing_stats["started"] += 1
+                    self.netsim.routing_stats.started += 1
                     # self.netsim.env.process(
                     self.send(peer, msg)
                     # )
@@ -65,7 +65,7 @@ class PRoPHETRouter(Router):
         """
         if msg.dst in self.peers and not self.msg_already_spread(msg, msg.dst):
             # self.log("sending directly to receiver")
-            self.netsim.routing_stats["started"] += 1
+            self.netsim.routing_stats.started += 1
             # self.netsim.env.process(
             self.send(msg.dst, msg)
             # )
@@ -80,7 +80,7 @@ class PRoPHETRouter(Router):
                         msg.dst
                     ):
                         # self.log("forwarding to peer")
-                        self.netsim.routing_stats["started"] += 1
+                        self.netsim.routing_stats.started += 1
                         # self.netsim.env.process(
                         self.send(peer, msg)
                         # )
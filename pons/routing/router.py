@@ -195,7 +195,7 @@ class Router(object):
         )
         self.stats["rx"] += 1
         # self.log("msg received: %s from %d" % (msg, remote_id))
-        self.netsim.routing_stats["relayed"] += 1
+        self.netsim.routing_stats.relayed += 1
         was_known = self.is_msg_known(msg)
         if not was_known:
             self.remember(remote_id, msg.unique_id())
@@ -203,15 +203,15 @@ class Router(object):
             if msg.dst == self.my_id:
                 # self.log("msg (%s) arrived on %s" % (msg.id, self.my_id))
                 self.stats["delivered"] += 1
-                self.netsim.routing_stats["delivered"] += 1
-                self.netsim.routing_stats["hops"] += msg.hops
-                self.netsim.routing_stats["latency"] += self.env.now - msg.created
+                self.netsim.routing_stats.delivered += 1
+                self.netsim.routing_stats.hops += msg.hops
+                self.netsim.routing_stats.latency += self.env.now - msg.created
                 for app in self.apps:
                     if app.service == msg.dst_service:
                         app._on_msg_received(msg)
         else:
             # self.log("msg already known", self.history)
-            self.netsim.routing_stats["dups"] += 1
+            self.netsim.routing_stats.dups += 1
         self.on_msg_received(msg, remote_id, was_known)
 
     def on_msg_received(self, msg: pons.Message, remote_id: int, was_known: bool):
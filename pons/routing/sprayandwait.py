@@ -27,7 +27,7 @@ class SprayAndWaitRouter(Router):
     def forward(self, msg):
         if msg.dst in self.peers and not self.msg_already_spread(msg, msg.dst):
             # self.log("sending directly to receiver")
-            self.netsim.routing_stats["started"] += 1
+            self.netsim.routing_stats.started += 1
             # self.netsim.env.process(
             self.send(msg.dst, msg)
             # )
@@ -42,7 +42,7 @@ class SprayAndWaitRouter(Router):
                 ):
                     # print("forwarding to peer")
                     outmsg = copy.deepcopy(msg)
-                    self.netsim.routing_stats["started"] += 1
+                    self.netsim.routing_stats.started += 1
                     if self.binary:
                         outmsg.metadata["copies"] = math.ceil(
                             msg.metadata["copies"] / 2
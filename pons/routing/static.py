@@ -82,7 +82,7 @@ class StaticRouter(Router):
         # self.log("%s peers: %s" % (msg, self.peers))
         if msg.dst in self.peers and not self.msg_already_spread(msg, msg.dst):
             # self.log("sending directly to receiver")
-            self.netsim.routing_stats["started"] += 1
+            self.netsim.routing_stats.started += 1
             # self.netsim.env.process(
             self.send(msg.dst, msg)
             # )
@@ -108,7 +108,7 @@ class StaticRouter(Router):
         if len(next_hops) > 0:
             next_hop = random.choice(next_hops)
             # self.log("forwarding to next hop: %d" % next_hop)
-            self.netsim.routing_stats["started"] += 1
+            self.netsim.routing_stats.started += 1
             # self.netsim.env.process(
             self.send(next_hop, msg)
             # )
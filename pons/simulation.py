@@ -2,8 +2,14 @@ import time
 from typing import List, Dict, Optional, Tuple
 from copy import deepcopy
 import os
-
-from pons.event_log import event_log, open_log, close_log, is_logging
+import platform
+
+from pons.event_log import (
+    event_log,
+    open_log,
+    close_log,
+    is_logging,
+)
 import pons.event_log
 from simpy import Environment
 
@@ -11,6 +17,10 @@ import pons
 from pons.node import Node
 from pons.event_log import event_log
 
+# below this number of nodes calculating the neighbors in Python is cheaper
+# than importing numpy and the distance kernel
+BULK_NEIGHBORS_MIN_NODES = 500
+
 
 def printProgressBar(
     iteration,
@@ -43,6 +53,83 @@ def printProgressBar(
         print()
 
 
+class _Stats(object):
+    """Base of the statistics counters.
+
+    The counters are read and updated as attributes. For compatibility with
+    the former plain dicts the results can still be read by key, e.g.
+    `stats["tx"]` or `dict(stats)`.
+    """
+
+    __slots__ = ()
+
+    # only used for calculating the averages, not part of the results
+    _internal = ()
+
+    def asdict(self) -> dict:
+        return {k: getattr(self, k) for k in self.__slots__ if k not in self._internal}
+
+    def keys(self):
+        return self.asdict().keys()
+
+    def __getitem__(self, key: str):
+        if key not in self.__slots__ or key in self._internal:
+            raise KeyError(key)
+        return getattr(self, key)
+
+
+class NetStats(_Stats):
+    """Counters of the network layer."""
+
+    __slots__ = ("tx", "rx", "drop", "loss")
+
+    def __init__(self):
+        self.tx = 0
+        self.rx = 0
+        self.drop = 0
+        self.loss = 0
+
+
+class RoutingStats(_Stats):
+    """Counters of the routing layer."""
+
+    __slots__ = (
+        "created",
+        "delivered",
+        "dropped",
+        "hops",
+        "latency",
+        "started",
+        "relayed",
+        "removed",
+        "aborted",
+        "dups",
+        "latency_avg",
+        "delivery_prob",
+        "hops_avg",
+        "overhead_ratio",
+    )
+
+    # only used for calculating the averages, not part of the results
+    _internal = ("hops", "latency")
+
+    def __init__(self):
+        self.created = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.hops = 0
+        self.latency = 0.0
+        self.started = 0
+        self.relayed = 0
+        self.removed = 0
+        self.aborted = 0
+        self.dups = 0
+        self.latency_avg = 0.0
+        self.delivery_prob = 0.0
+        self.hops_avg = 0.0
+        self.overhead_ratio = 0.0
+
+
 class NetSim(object):
     """A network simulator."""
 
@@ -77,24 +164,11 @@ class NetSim(object):
         self.config = config
 
         self.do_actual_scan = config.get("real_scan", False)
+        # set by setup(), None until it is known
+        self._uses_contactplan = None
 
-        self.net_stats = {"tx": 0, "rx": 0, "drop": 0, "loss": 0}
-        self.routing_stats = {
-            "created": 0,
-            "delivered": 0,
-            "dropped": 0,
-            "hops": 0,
-            "latency": 0.0,
-            "started": 0,
-            "relayed": 0,
-            "removed": 0,
-            "aborted": 0,
-            "dups": 0,
-            "latency_avg": 0.0,
-            "delivery_prob": 0.0,
-            "hops_avg": 0.0,
-            "overhead_ratio": 0.0,
-        }
+        self.net_stats = NetStats()
+        self.routing_stats = RoutingStats()
         self.router_stats = {}
 
         if name_to_id_map is None:
@@ -133,6 +207,38 @@ class NetSim(object):
             for node in self.nodes.values():
                 print(node.neighbors)
 
+    def _reporter(self, interval=60.0):
+        """Periodically report the simulation progress and rate."""
+        last_real = self._start_real
+        last_sim = 0.0
+        while True:
+            yield self.env.timeout(interval)
+            now_sim = self.env.now
+            if now_sim >= self.duration:
+                return
+            now_real = time.time()
+            diff = now_real - last_real
+            if diff > 60:
+                rate = (now_sim - last_sim) / diff
+                print(
+                    "\n\nsimulated %d seconds in %d seconds (%.2f x real time)"
+                    % (now_sim - last_sim, diff, rate)
+                )
+                print(
+                    "real: %f, sim: %d rate: %.02f steps/s"
+                    % (now_real - self._start_real, now_sim, rate)
+                )
+                print()
+                last_real = now_real
+                last_sim = now_sim
+            printProgressBar(
+                now_sim,
+                self.duration,
+                prefix="Progress:",
+                suffix="Complete",
+                length=50,
+            )
+
     def setup(self):
         print("initialize simulation: ", self.config)
 
@@ -141,10 +247,10 @@ class NetSim(object):
             self.mover.start()
 
         if self.config is not None:
-            if self.config.get("movement_logger", True):
+            if self.config.get("movement_logger", False):
                 self.env.process(self.start_movement_logger())
 
-            if self.config.get("peers_logger", True):
+            if self.config.get("peers_logger", False):
                 self.env.process(self.start_peers_logger())
 
             if "LOG_FILE" in os.environ:
@@ -168,24 +274,81 @@ class NetSim(object):
             # print("-> start node %d w/ %d apps" % (n.id, len(n.apps)))
             n.start(self)
 
+        self._uses_contactplan = self.using_contactplan()
+
         if self.msggens is not None:
+            generators = {
+                None: pons.message_event_generator,
+                "single": pons.message_event_generator,
+                "burst": pons.message_burst_generator,
+            }
+            process = self.env.process
             for msggen in self.msggens:
-                if (
-                    "type" not in msggen.keys()
-                    or msggen["type"] is None
-                    or msggen["type"] == "single"
-                ):
-                    self.env.process(pons.message_event_generator(self, msggen))
-                elif msggen["type"] == "burst":
-                    self.env.process(pons.message_burst_generator(self, msggen))
-                else:
+                generator = generators.get(msggen.get("type"))
+                if generator is None:
                     raise Exception("unknown message generator type")
+                process(generator(self, msggen))
 
         print(self.nodes)
-        for n in self.nodes.values():
-            n.calc_neighbors(0, self.nodes.values())
+        self._bulk_neighbors(0, list(self.nodes.values()))
+
+    def _bulk_neighbors(
+        self,
+        simtime,
+        nodes: List[Node],
+        coords: Optional[Tuple[List[float], List[float], List[float]]] = None,
+    ):
+        """Calculate the neighbors of all nodes at once.
+
+        Uses the distance kernel from `pons._kernels` for networks of at least
+        `BULK_NEIGHBORS_MIN_NODES` nodes if numpy is available and no contact
+        plans are in use, otherwise falls back to calling
+        `Node.calc_neighbors` for every node. Already collected x, y and z
+        coordinates of the nodes can be passed as `coords`.
+        """
+        if self._uses_contactplan is None:
+            self._uses_contactplan = self.using_contactplan()
+        np = None
+        # numpy is slow on PyPy (cpyext), there the JIT handles the Python path
+        if (
+            not self._uses_contactplan
+            and len(nodes) >= BULK_NEIGHBORS_MIN_NODES
+            and platform.python_implementation() != "PyPy"
+        ):
+            try:
+                import numpy as np
+                from pons._kernels import neighbors as neighbors_kernel
+            except ImportError:
+                np = None
+
+        if np is None:
+            for n in nodes:
+                n.calc_neighbors(simtime, nodes)
+            return
+
+        if coords is None:
+            coords = ([n.x for n in nodes], [n.y for n in nodes], [n.z for n in nodes])
+        xs = np.array(coords[0], dtype=float)
+        ys = np.array(coords[1], dtype=float)
+        zs = np.array(coords[2], dtype=float)
+
+        net_names = {name for n in nodes for name in n.net}
+        for name in net_names:
+            members = [i for i, n in enumerate(nodes) if name in n.net]
+            member_ids = [nodes[i].id for i in members]
+            ranges_sq = np.array(
+                [nodes[i].net[name].range_sq for i in members], dtype=float
+            )
+            indptr, indices = neighbors_kernel(
+                xs[members], ys[members], zs[members], ranges_sq
+            )
+            for row, i in enumerate(members):
+                nodes[i].neighbors[name] = [
+                    member_ids[j] for j in indices[indptr[row] : indptr[row + 1]]
+                ]
 
     def using_contactplan(self):
+        """Check if any network of any node uses a contact plan."""
         for n in self.nodes.values():
             for net in n.net.values():
                 if net.contactplan is not None:
@@ -200,142 +363,136 @@ class NetSim(object):
 
     def contact_logger(self, contactplan):
         """Start a contact logger."""
-        if not is_logging():
+        if not is_logging("LINK"):
             return
         print("start contact logger: ", type(contactplan))
         if contactplan is None:
             print("No contact plan")
             return
-        initial_events = contactplan.at(0)
-        if len(initial_events) != 0:
-            for e in initial_events:
-                if e.timespan[0] == 0:
-                    event_log(0, "LINK", {"event": "UP", "nodes": e.nodes})
-
-        next_event = contactplan.next_event(0)
-        if next_event is None:
+        # either a list of contacts or a plan holding them
+        contacts = contactplan
+        if not isinstance(contacts, list):
+            contacts = contactplan.contacts
+
+        # sort all link changes once instead of querying the plan at every event
+        link_events = []
+        for c in contacts:
+            if not isinstance(c, pons.CoreContact):
+                continue
+            link_events.append((c.timespan[0], 1, "UP", c.nodes))
+            # links go down before others come up at the same time,
+            # unless the contact has no duration at all
+            down_order = 2 if c.timespan[0] == c.timespan[1] else 0
+            link_events.append((c.timespan[1], down_order, "DOWN", c.nodes))
+        link_events.sort(key=lambda e: (e[0], e[1]))
+        if len(link_events) == 0:
             print("No events in contact plan")
             return
 
+        timeout = self.env.timeout
+        log = event_log
+        duration = self.duration
         total = 0
-        while True:
-            yield self.env.timeout(next_event)
-            total += next_event
-            events = contactplan.at(total)
-            # print(len(events), "events at", total, ":", events)
-            for e in events:
-                if e.timespan[0] == total:
-                    event_log(total, "LINK", {"event": "UP", "nodes": e.nodes})
-                if e.timespan[1] == total:
-                    event_log(total, "LINK", {"event": "DOWN", "nodes": e.nodes})
-
-            next_event = contactplan.next_event(total)
-            if next_event is None or next_event > self.duration:
+        for ts, _, event, nodes in link_events:
+            if ts > duration:
                 break
-            next_event -= total
+            if ts > total:
+                yield timeout(ts - total)
+                total = ts
+            log(total, "LINK", {"event": event, "nodes": nodes})
 
     def run(self):
         print("== running simulation for %d seconds ==" % self.duration)
 
-        all_contactplans = set()
-
-        for n in self.nodes.values():
-            event_log(
-                0,
-                "CONFIG",
-                {
-                    "event": "START",
-                    "id": n.id,
-                    "name": n.name,
-                    "x": n.x,
-                    "y": n.y,
-                    "capacity": n.router.capacity,
-                    "used": n.router.used,
-                },
-            )
+        env = self.env
+        nodes = list(self.nodes.values())
+        duration = self.duration + 1.0
+
+        # maps the hashable value of each unique contact plan to the plan itself
+        all_contactplans = {}
+        contacts = set()
+        if self._uses_contactplan is None:
+            self._uses_contactplan = self.using_contactplan()
+        uses_contactplan = self._uses_contactplan
+        now_sim = env.now
+        xs = []
+        ys = []
+        zs = []
+
+        log_config = is_logging("CONFIG")
+        for n in nodes:
+            if log_config:
+                event_log(
+                    0,
+                    "CONFIG",
+                    {
+                        "event": "START",
+                        "id": n.id,
+                        "name": n.name,
+                        "x": n.x,
+                        "y": n.y,
+                        "capacity": n.router.capacity,
+                        "used": n.router.used,
+                    },
+                )
+            xs.append(n.x)
+            ys.append(n.y)
+            zs.append(n.z)
+            if uses_contactplan:
+                n.add_all_neighbors(now_sim, nodes)
             for net in n.net.values():
                 net.start(self)
-                if net.contactplan is not None and net.contactplan.contacts is not None:
-                    if isinstance(net.contactplan.contacts, list):
-                        all_contactplans.add(tuple(net.contactplan.contacts))
+                if net.contactplan is None:
+                    continue
+                if uses_contactplan:
+                    contacts.update(net.contactplan.fixed_links())
+                plan_contacts = net.contactplan.contacts
+                if plan_contacts is not None:
+                    if isinstance(plan_contacts, list):
+                        all_contactplans.setdefault(tuple(plan_contacts), plan_contacts)
                     else:
-                        all_contactplans.add(net.contactplan.contacts)
+                        all_contactplans.setdefault(plan_contacts, plan_contacts)
 
-        for cp in all_contactplans:
+        for cp in all_contactplans.values():
             print(cp)
-            self.env.process(self.contact_logger(cp))
+            env.process(self.contact_logger(cp))
         print("global number of unique contact plans: ", len(all_contactplans))
 
         start_real = time.time()
-        last_real = start_real
-        last_sim = 0.0
-
-        if self.using_contactplan():
-            contacts = set()
-            for n in self.nodes.values():
-                n.add_all_neighbors(self.env.now, self.nodes.values())
-                for net in n.net.values():
-                    contacts.update(net.contactplan.fixed_links())
 
-                # print(
-                #     "node %f %d: %d %d"
-                #     % (
-                #         self.env.now,
-                #         n.id,
-                #         len(n.net[list(n.net.keys())[0]].contactplan.at(0)),
-                #         len(n.neighbors[list(n.neighbors.keys())[0]]),
-                #     )
-                # )
+        if uses_contactplan:
             print("global number of unique contacts: ", len(contacts), contacts)
-            for c in contacts:
-                event_log(
-                    0,
-                    "LINK",
-                    {
-                        "event": "SET",
-                        "node1": c[0],
-                        "node2": c[1],
-                    },
-                )
+            if is_logging("LINK"):
+                for c in contacts:
+                    event_log(
+                        0,
+                        "LINK",
+                        {
+                            "event": "SET",
+                            "node1": c[0],
+                            "node2": c[1],
+                        },
+                    )
 
         else:
-            now_sim = self.env.now
-            for n in self.nodes.values():
-                n.calc_neighbors(now_sim, self.nodes.values())
+            self._bulk_neighbors(now_sim, nodes, coords=(xs, ys, zs))
 
         print("")
-        while self.env.now < self.duration + 1.0:
-            # self.env.run(until=self.duration)
-            now_sim = self.env.now
-            next_stop = min(self.duration + 1.0, now_sim + 5.0)
-            self.env.run(until=next_stop)
-            now_real = time.time()
-            diff = now_real - last_real
-            if diff > 60:
-                rate = (now_sim - last_sim) / diff
-                print(
-                    "\n\nsimulated %d seconds in %d seconds (%.2f x real time)"
-                    % (now_sim - last_sim, diff, rate)
-                )
-                print(
-                    "real: %f, sim: %d rate: %.02f steps/s"
-                    % (now_real - start_real, now_sim, rate)
-                )
-                print()
-                last_real = now_real
-                last_sim = now_sim
-            printProgressBar(
-                now_sim,
-                self.duration,
-                prefix="Progress:",
-                suffix="Complete",
-                length=50,
-            )
+        self._start_real = start_real
+        env.process(self._reporter())
+        env.run(until=duration)
+        printProgressBar(
+            self.duration,
+            self.duration,
+            prefix="Progress:",
+            suffix="Complete",
+            length=50,
+        )
 
         # self.env.run(until=self.duration)
         now_real = time.time()
         diff = now_real - start_real
-        now_sim = self.env.now
+        now_sim = env.now
 
         if diff > 0:
             rate = (now_sim) / diff
@@ -349,25 +506,14 @@ class NetSim(object):
         )
         print("real: %f, sim: %d rate: %.02f steps/s" % (diff, now_sim, rate))
 
-        if self.routing_stats["delivered"] > 0:
-            self.routing_stats["latency_avg"] = (
-                self.routing_stats["latency"] / self.routing_stats["delivered"]
-            )
-            self.routing_stats["hops_avg"] = (
-                self.routing_stats["hops"] / self.routing_stats["delivered"]
-            )
-            self.routing_stats["overhead_ratio"] = (
-                self.routing_stats["relayed"] - self.routing_stats["delivered"]
-            ) / self.routing_stats["delivered"]
-        if self.routing_stats["created"] > 0:
-            self.routing_stats["delivery_prob"] = (
-                self.routing_stats["delivered"] / self.routing_stats["created"]
-            )
+        stats = self.routing_stats
+        if stats.delivered > 0:
+            stats.latency_avg = stats.latency / stats.delivered
+            stats.hops_avg = stats.hops / stats.delivered
+            stats.overhead_ratio = (stats.relayed - stats.delivered) / stats.delivered
+        if stats.created > 0:
+            stats.delivery_prob = stats.delivered / stats.created
         else:
-            self.routing_stats["delivery_prob"] = 0.0
-
-        # delete entry "hops" and "latency" from routing_stats as they are only used for calculating the average
-        del self.routing_stats["hops"]
-        del self.routing_stats["latency"]
+            stats.delivery_prob = 0.0
 
         close_log()
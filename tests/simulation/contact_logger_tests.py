@@ -0,0 +1,89 @@
+import json
+import os
+import tempfile
+import unittest
+
+import pons
+import pons.event_log
+from pons import CoreContact
+
+
+class ContactLoggerTests(unittest.TestCase):
+    """
+    tests for the LINK events written by the contact logger
+    """
+
+    def setUp(self):
+        fd, self.log_file = tempfile.mkstemp(suffix=".log")
+        os.close(fd)
+        pons.event_log.event_filter = []
+        pons.event_log.open_log(self.log_file)
+
+    def tearDown(self):
+        pons.event_log.close_log()
+        os.remove(self.log_file)
+
+    def link_events(self, contacts, duration=100):
+        nodes = pons.generate_nodes(3, net=[pons.NetworkSettings("test", range=0)])
+        netsim = pons.NetSim(duration, nodes, (100, 100))
+        netsim.env.process(netsim.contact_logger(contacts))
+        netsim.env.run(until=duration + 1)
+        pons.event_log.close_log()
+
+        events = []
+        with open(self.log_file) as fh:
+            for line in fh:
+                ts, category, msg = line.strip().split(maxsplit=2)
+                if category == "LINK":
+                    msg = json.loads(msg)
+                    events.append((float(ts), msg["event"], tuple(msg["nodes"])))
+        return events
+
+    def test_event_order(self):
+        """
+        tests the order of overlapping, back-to-back and zero-length contacts
+        """
+        contacts = [
+            CoreContact((0, 10), (0, 1), 1000, 0.0, 0.0, 0.0),
+            CoreContact((0, 0), (1, 2), 1000, 0.0, 0.0, 0.0),
+            CoreContact((5, 20), (0, 1), 1000, 0.0, 0.0, 0.0),
+            CoreContact((20, 30), (0, 1), 1000, 0.0, 0.0, 0.0),
+            CoreContact((40, 40), (1, 2), 1000, 0.0, 0.0, 0.0),
+        ]
+        self.assertEqual(
+            self.link_events(contacts),
+            [
+                (0.0, "UP", (0, 1)),
+                (0.0, "UP", (1, 2)),
+                (0.0, "DOWN", (1, 2)),
+                (5.0, "UP", (0, 1)),
+                (10.0, "DOWN", (0, 1)),
+                (20.0, "DOWN", (0, 1)),
+                (20.0, "UP", (0, 1)),
+                (30.0, "DOWN", (0, 1)),
+                (40.0, "UP", (1, 2)),
+                (40.0, "DOWN", (1, 2)),
+            ],
+        )
+
+    def test_after_duration(self):
+        """
+        tests that no events after the end of the simulation are logged
+        """
+        contacts = [
+            CoreContact((10, 200), (0, 1), 1000, 0.0, 0.0, 0.0),
+            CoreContact((150, 160), (1, 2), 1000, 0.0, 0.0, 0.0),
+        ]
+        self.assertEqual(self.link_events(contacts), [(10.0, "UP", (0, 1))])
+
+    def test_not_logging(self):
+        """
+        tests that nothing is logged if LINK events are filtered
+        """
+        pons.event_log.event_filter = ["LINK"]
+        contacts = [CoreContact((0, 10), (0, 1), 1000, 0.0, 0.0, 0.0)]
+        self.assertEqual(self.link_events(contacts), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
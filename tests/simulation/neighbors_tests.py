@@ -0,0 +1,103 @@
+import importlib.util
+import random
+import unittest
+from unittest import mock
+
+import pons
+import pons.simulation
+
+HAS_NUMPY = importlib.util.find_spec("numpy") is not None
+HAS_NUMBA = importlib.util.find_spec("numba") is not None
+
+
+class BulkNeighborsTests(unittest.TestCase):
+    """
+    tests that the neighbor kernels find the same neighbors as Node.calc_neighbors
+    """
+
+    NUM_NODES = 300
+
+    def make_nodes(self):
+        random.seed(42)
+        nodes = []
+        for i in range(self.NUM_NODES):
+            # per node ranges, so that contacts can be asymmetric
+            net_a = pons.NetworkSettings("a", range=random.choice([5, 30, 80]))
+            net_b = pons.NetworkSettings("b", range=100)
+            # some nodes are only part of one of the networks
+            net = random.choice([[net_a], [net_b], [net_a, net_b]])
+            node = pons.Node(i, net=net)
+            # integer coordinates to get nodes exactly at the edge of the range
+            node.x = float(random.randint(0, 400))
+            node.y = float(random.randint(0, 400))
+            node.z = float(random.choice([0, 3, 4]))
+            nodes.append(node)
+        # exactly in range of node 0 (3-4-5 triangle), out of range of node 1
+        nodes[0].net = {"a": pons.NetworkSettings("a", range=5)}
+        nodes[1].net = {"a": pons.NetworkSettings("a", range=4.99)}
+        nodes[0].x, nodes[0].y, nodes[0].z = 1000.0, 1000.0, 0.0
+        nodes[1].x, nodes[1].y, nodes[1].z = 1003.0, 1000.0, 4.0
+        for node in nodes:
+            node.neighbors = {name: [] for name in node.net}
+        return nodes
+
+    def expected_neighbors(self):
+        nodes = self.make_nodes()
+        for node in nodes:
+            node.calc_neighbors(0, nodes)
+        return {node.id: node.neighbors for node in nodes}
+
+    def bulk_neighbors(self):
+        nodes = self.make_nodes()
+        netsim = pons.NetSim(100, nodes, (1100, 1100))
+        netsim._bulk_neighbors(0, nodes)
+        return {node.id: node.neighbors for node in nodes}
+
+    def test_edge_of_range(self):
+        """
+        tests the scenario itself: node 0 sees node 1, but not the other way round
+        """
+        neighbors = self.expected_neighbors()
+        self.assertIn(1, neighbors[0]["a"])
+        self.assertNotIn(0, neighbors[1]["a"])
+
+    def test_python(self):
+        """
+        tests the fallback for networks below BULK_NEIGHBORS_MIN_NODES
+        """
+        with mock.patch.object(
+            pons.simulation, "BULK_NEIGHBORS_MIN_NODES", self.NUM_NODES + 1
+        ):
+            self.assertEqual(self.bulk_neighbors(), self.expected_neighbors())
+
+    @unittest.skipUnless(HAS_NUMPY, "numpy is not installed")
+    @mock.patch.object(pons.simulation, "BULK_NEIGHBORS_MIN_NODES", 0)
+    def test_numpy(self):
+        """
+        tests the numpy kernel, also with blocks not dividing the number of nodes
+        """
+        import pons._kernels
+
+        for block_rows in (7, pons._kernels.NUMPY_BLOCK_ROWS, 1000):
+            with mock.patch.multiple(
+                pons._kernels,
+                NUMBA_MIN_NODES=self.NUM_NODES + 1,
+                NUMPY_BLOCK_ROWS=block_rows,
+            ):
+                self.assertEqual(self.bulk_neighbors(), self.expected_neighbors())
+
+    @unittest.skipUnless(HAS_NUMBA, "numba is not installed")
+    @mock.patch.object(pons.simulation, "BULK_NEIGHBORS_MIN_NODES", 0)
+    def test_numba(self):
+        """
+        tests the numba kernel
+        """
+        import pons._kernels
+
+        self.assertIsNotNone(pons._kernels._numba_neighbors())
+        with mock.patch.object(pons._kernels, "NUMBA_MIN_NODES", 0):
+            self.assertEqual(self.bulk_neighbors(), self.expected_neighbors())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,6 +4,8 @@ import sys
 import networkx as nx
 from PIL import Image, ImageDraw
 import argparse
+from bisect import bisect_left, bisect_right
+from collections import deque
 
 try:
     import pons
@@ -12,7 +14,7 @@ except ImportError:
 
 from pons.net.contactplan import CoreContactPlan, CoreContact
 from pons.net.netplan import NetworkPlan
-from pons.event_log import get_events_in_range, load_event_log
+from pons.event_log import load_event_log
 
 
 def progressBar(
@@ -90,29 +92,40 @@ def draw_node(img, x, y, name="", store_usage=None, app_rx=False, app_tx=False):
         img.circle((x, y), 12, outline="blue", width=2)
 
 
-def draw_network(g, connections=[], i=0, active_links=[], app_rx=[], app_tx=[]):
+def draw_network_pil(
+    g,
+    connections=[],
+    i=0,
+    active_links=frozenset(),
+    app_rx=frozenset(),
+    app_tx=frozenset(),
+):
+    """Draw a frame as PIL image.
+
+    `active_links` must contain node id tuples ordered as (min, max).
+    """
     global max_x, max_y, img_size, max_time
     image = Image.new("RGB", img_size, "white")
     draw = ImageDraw.Draw(image)
 
+    coords = {n: (int(d["x"]), int(d["y"])) for n, d in g.nodes.data()}
+
     # draw the links
     for edge in connections:
         color = "black"
         w = 1
-        link = tuple(sorted([edge[0], edge[1]]))
-        if link in active_links:
-            color = "green"
-            w = 4
-        x1 = int(g.nodes[edge[0]]["x"])
-        y1 = int(g.nodes[edge[0]]["y"])
-        x2 = int(g.nodes[edge[1]]["x"])
-        y2 = int(g.nodes[edge[1]]["y"])
+        if active_links:
+            a, b = edge[0], edge[1]
+            if ((a, b) if a < b else (b, a)) in active_links:
+                color = "green"
+                w = 4
+        x1, y1 = coords[edge[0]]
+        x2, y2 = coords[edge[1]]
         draw.line((x1, y1, x2, y2), fill=color, width=w)
 
     # draw the nodes
     for node in g.nodes.data():
-        x = int(node[1]["x"])
-        y = int(node[1]["y"])
+        x, y = coords[node[0]]
         store_usage = None
         if "store" in node[1]:
             store_usage = node[1]["store"]
@@ -135,6 +148,119 @@ def draw_network(g, connections=[], i=0, active_links=[], app_rx=[], app_tx=[]):
     return image
 
 
+# OpenCV uses BGR color tuples instead of PIL color names
+BGR_COLORS = {
+    "white": (255, 255, 255),
+    "black": (0, 0, 0),
+    "lightgrey": (211, 211, 211),
+    "green": (0, 128, 0),
+    "blue": (255, 0, 0),
+    "red": (0, 0, 255),
+}
+
+
+def draw_text_cv2(frame_buf, x, y, text, color="black"):
+    # PIL positions text by its top left corner, OpenCV by its baseline
+    cv2.putText(
+        frame_buf,
+        text,
+        (x, y + 10),
+        cv2.FONT_HERSHEY_SIMPLEX,
+        0.35,
+        BGR_COLORS[color],
+        1,
+        cv2.LINE_AA,
+    )
+
+
+def draw_progress_cv2(frame_buf, x, y, progress, max_width):
+    line_length = int(progress * max_width)
+    cv2.line(frame_buf, (x, y), (x + max_width, y), BGR_COLORS["lightgrey"], 4)
+    cv2.line(frame_buf, (x, y), (x + line_length, y), BGR_COLORS["black"], 4)
+
+
+def draw_node_cv2(
+    frame_buf, x, y, name="", store_usage=None, app_rx=False, app_tx=False
+):
+    if name:
+        draw_text_cv2(frame_buf, x + 6, y + 6, name)
+    if store_usage is not None:
+        # draw up to four blocks representing the store usage
+        if store_usage > 0:
+            num_blocks = store_usage // 25
+
+            num_blocks += 1
+            for i in range(num_blocks):
+                color = "blue"
+                if store_usage > 95:
+                    color = "red"
+                if i > 4:
+                    break
+                cv2.rectangle(
+                    frame_buf,
+                    (x + 14, y - i * 5 - i * 2),
+                    (x + 18, y + 4 - i * 5 - i * 2),
+                    BGR_COLORS[color],
+                    -1,
+                )
+
+    cv2.circle(frame_buf, (x, y), 8, BGR_COLORS["blue"], -1)
+    if app_rx:
+        cv2.circle(frame_buf, (x, y), 13, BGR_COLORS["green"], 2)
+    if app_tx:
+        cv2.circle(frame_buf, (x, y), 11, BGR_COLORS["blue"], 2)
+
+
+def draw_network_cv2(
+    frame_buf,
+    g,
+    connections=[],
+    i=0,
+    active_links=frozenset(),
+    app_rx=frozenset(),
+    app_tx=frozenset(),
+):
+    """Draw a frame directly into a preallocated BGR numpy buffer.
+
+    `active_links` must contain node id tuples ordered as (min, max).
+    """
+    global max_time
+
+    height, width = frame_buf.shape[:2]
+    cv2.rectangle(frame_buf, (0, 0), (width, height), BGR_COLORS["white"], -1)
+
+    coords = {n: (int(d["x"]), int(d["y"])) for n, d in g.nodes.data()}
+
+    # draw the links
+    for edge in connections:
+        color = "black"
+        w = 1
+        if active_links:
+            a, b = edge[0], edge[1]
+            if ((a, b) if a < b else (b, a)) in active_links:
+                color = "green"
+                w = 4
+        x1, y1 = coords[edge[0]]
+        x2, y2 = coords[edge[1]]
+        cv2.line(frame_buf, (x1, y1), (x2, y2), BGR_COLORS[color], w)
+
+    # draw the nodes
+    for node in g.nodes.data():
+        x, y = coords[node[0]]
+        draw_node_cv2(
+            frame_buf,
+            x,
+            y,
+            node[1]["name"],
+            store_usage=node[1].get("store"),
+            app_tx=node[0] in app_tx,
+            app_rx=node[0] in app_rx,
+        )
+
+    draw_text_cv2(frame_buf, 10, 10, "Time: %ds" % i)
+    draw_progress_cv2(frame_buf, 10, height - 10, i / max_time, width - 20)
+
+
 import math
 
 max_x = 0
@@ -145,10 +271,12 @@ min_x = math.inf
 min_y = math.inf
 max_time = 0
 img_size = (0, 0)
+# only imported in main() when writing an MP4
+cv2 = None
 
 
 def main():
-    global max_x, max_y, max_time, img_size, min_x, min_y, extra_x, extra_y
+    global max_x, max_y, max_time, img_size, min_x, min_y, extra_x, extra_y, cv2
     parser = argparse.ArgumentParser(description="Animate a network replay / event log")
     parser.add_argument(
         "-o", "--output", type=str, help="The output image file", required=True
@@ -200,6 +328,7 @@ def main():
             import numpy as np
         except ImportError:
             print("You need to have OpenCV installed to save to MP4")
+            sys.exit(1)
 
     if modeContactGraph:
         # print(args.graph)
@@ -229,8 +358,21 @@ def main():
             filter_in.append("APP")
 
         events, max_time = load_event_log(args.event_log, filter_in=filter_in)
+        ts_sorted = sorted(events.keys())
+
+        def events_between(start, end):
+            """Yield all events with start <= ts <= end."""
+            lo = bisect_left(ts_sorted, start)
+            hi = bisect_right(ts_sorted, end)
+            for ts_slot in ts_sorted[lo:hi]:
+                for e in events[ts_slot]:
+                    if e[0] >= start and e[0] <= end:
+                        yield e
+
         g = nx.Graph()
         contacts = []
+        # currently active links, keyed by their nodes, oldest first
+        open_contacts = {}
         for ts, e_list in events.items():
             # print(ts, e_list)
             for ts, cat, event in e_list:
@@ -244,18 +386,22 @@ def main():
                     g.add_node(event["id"], x=x, y=y, name=event["name"])
                 elif cat == "LINK":
                     if event["event"] == "UP":
-                        contact = CoreContact((ts, -1), event["nodes"], 0, 0, 0, 0)
-                        contacts.append(contact)
+                        nodes = tuple(event["nodes"])
+                        contact = CoreContact((ts, -1), nodes, 0, 0, 0, 0)
+                        open_contacts.setdefault(nodes, deque()).append(contact)
                     if event["event"] == "DOWN":
-                        for c in contacts:
-                            if c.nodes == event["nodes"] and c.timespan[1] == -1:
-                                timespan = (c.timespan[0], ts)
-                                contacts.remove(c)
-                                c = CoreContact(timespan, event["nodes"], 0, 0, 0, 0)
-                                contacts.append(c)
+                        open_for_nodes = open_contacts.get(tuple(event["nodes"]))
+                        if open_for_nodes:
+                            c = open_for_nodes.popleft()
+                            c.timespan = (c.timespan[0], ts)
+                            contacts.append(c)
                     if event["event"] == "SET":
                         g.add_edge(event["node1"], event["node2"])
 
+        # links that never went down stay open
+        for open_for_nodes in open_contacts.values():
+            contacts.extend(open_for_nodes)
+
         for n in g.nodes.keys():
             if "store" in args.extra_information:
                 g.nodes[n]["store"] = 0
@@ -276,6 +422,28 @@ def main():
 
     max_steps = max_time
 
+    # the connections only change when a contact starts or ends, so they are
+    # cached across frames as long as no contact boundary has been passed
+    if cplan is not None:
+        starts = sorted(c.timespan[0] for c in cplan.contacts)
+        ends = sorted(c.timespan[1] for c in cplan.contacts)
+    else:
+        starts = []
+        ends = []
+    cached_conns_key = None
+    cached_conns = None
+
+    if output_mp4:
+        # a single frame buffer is reused for all frames which are streamed
+        # directly to the video writer
+        frame_buf = np.zeros((img_size[1], img_size[0], 3), dtype=np.uint8)
+        out = cv2.VideoWriter(
+            args.output,
+            cv2.VideoWriter_fourcc(*"mp4v"),
+            fps,
+            img_size,
+        )
+
     for i in progressBar(
         range(0, max_steps + 1, args.step_size),
         prefix="Progress:",
@@ -286,7 +454,7 @@ def main():
         apps_rx = set()
         apps_tx = set()
         if not modeContactGraph:
-            for ts, cat, event in get_events_in_range(events, i - args.step_size, i):
+            for ts, cat, event in events_between(i - args.step_size, i):
                 if cat == "MOVE":
                     if event["event"] == "SET":
                         g.nodes[event["id"]]["x"] = int(event["x"])
@@ -305,36 +473,41 @@ def main():
                 elif cat == "ROUTER" and "bundles_rxtx" in args.extra_information:
 
                     if event["event"] == "TX" or event["event"] == "RX":
-                        link = sorted([int(event["src"]), int(event["dst"])])
-                        active_links.add(tuple(link))
+                        a, b = int(event["src"]), int(event["dst"])
+                        active_links.add((a, b) if a < b else (b, a))
                 elif cat == "APP" and "app_rxtx" in args.extra_information:
                     if event["event"] == "TX":
                         apps_tx.add(int(event["src"]))
                     if event["event"] == "RX":
                         apps_rx.add(int(event["id"]))
-        image = draw_network(
-            g,
-            plan.connections_at_time(i),
-            i,
-            active_links=list(active_links),
-            app_rx=list(apps_rx),
-            app_tx=list(apps_tx),
-        )
+        conns_key = (bisect_right(starts, i), bisect_left(ends, i))
+        if conns_key != cached_conns_key:
+            cached_conns = plan.connections_at_time(i)
+            cached_conns_key = conns_key
         if output_mp4:
-            image = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
-
-        frames.append(image)
+            draw_network_cv2(
+                frame_buf,
+                g,
+                cached_conns,
+                i,
+                active_links=active_links,
+                app_rx=apps_rx,
+                app_tx=apps_tx,
+            )
+            out.write(frame_buf)
+        else:
+            image = draw_network_pil(
+                g,
+                cached_conns,
+                i,
+                active_links=active_links,
+                app_rx=apps_rx,
+                app_tx=apps_tx,
+            )
+            frames.append(image)
 
     if output_mp4:
         print("Saving MP4...")
-        out = cv2.VideoWriter(
-            args.output,
-            cv2.VideoWriter_fourcc(*"mp4v"),
-            fps,
-            img_size,
-        )
-        for frame in frames:
-            out.write(frame)
         out.release()
         print()
         print(